@@ -53,34 +53,42 @@ class PermissionManager:
         In production, this would query your user database
         """
         try:
-            # TODO: Replace this with actual database query to your Supabase
-            # Example implementation:
-            # from supabase import create_client, Client
-            # supabase: Client = create_client(url, key)
-            # 
-            # # Get user subscription
-            # subscription = supabase.table('subscribers').select('subscription_tier, subscribed').eq('user_id', user_id).execute()
-            # 
-            # if subscription.data and subscription.data[0]['subscribed']:
-            #     plan = subscription.data[0]['subscription_tier']
-            # else:
-            #     plan = "free"
-            
-            # For demo purposes, return premium permissions
-            plan = os.getenv("DEMO_USER_PLAN", "premium")
-            
-            permissions = self.plan_limits.get(plan, self.plan_limits["free"]).copy()
-            permissions["plan"] = plan
-            permissions["user_id"] = user_id
-            
-            return permissions
+            return self.fetch_user_permissions(user_id)
         except Exception as e:
             print(f"Error getting user permissions: {e}")
             # Return free plan as fallback
-            permissions = self.plan_limits["free"].copy()
-            permissions["plan"] = "free"
-            permissions["user_id"] = user_id
-            return permissions
+            return self.fallback_permissions(user_id)
+    
+    def fetch_user_permissions(self, user_id: str) -> Dict:
+        """Look up user permissions, raising if the lookup fails"""
+        # TODO: Replace this with actual database query to your Supabase
+        # Example implementation:
+        # from supabase import create_client, Client
+        # supabase: Client = create_client(url, key)
+        # 
+        # # Get user subscription
+        # subscription = supabase.table('subscribers').select('subscription_tier, subscribed').eq('user_id', user_id).execute()
+        # 
+        # if subscription.data and subscription.data[0]['subscribed']:
+        #     plan = subscription.data[0]['subscription_tier']
+        # else:
+        #     plan = "free"
+        
+        # For demo purposes, return premium permissions
+        plan = os.getenv("DEMO_USER_PLAN", "premium")
+        
+        permissions = self.plan_limits.get(plan, self.plan_limits["free"]).copy()
+        permissions["plan"] = plan
+        permissions["user_id"] = user_id
+        
+        return permissions
+    
+    def fallback_permissions(self, user_id: str) -> Dict:
+        """Free plan permissions, used when the lookup fails"""
+        permissions = self.plan_limits["free"].copy()
+        permissions["plan"] = "free"
+        permissions["user_id"] = user_id
+        return permissions
     
     def check_template_limit(self, user_id: str, current_count: int) -> bool:
         """Check if user can upload more templates"""
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test Placeholder Attributes
+Checks that braces inside XML attributes (the GUIDs Word writes for pictures)
+are neither extracted nor filled as placeholders
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from PIL import Image
+from working_fastapi import extract_placeholders_from_docx, fill_word_template
+
+PICTURE_GUID = "{28A0092B-C50C-407E-A947-70E740481C1C}"
+
+def build_document_with_picture(path):
+    """Save a document with placeholders around a picture, tagged the way Word tags it"""
+    image = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(image, format="PNG")
+    image.seek(0)
+
+    doc = Document()
+    doc.add_paragraph("Vessel: {vessel_name}")
+    doc.add_picture(image)
+    paragraph = doc.add_paragraph("IMO: ")
+    paragraph.add_run("{im")
+    paragraph.add_run("o}")
+
+    # Word adds an extension list with a braced GUID to every inserted picture
+    blip = doc.element.body.find('.//' + qn('a:blip'))
+    blip.append(parse_xml(
+        f'<a:extLst {nsdecls("a")}><a:ext uri="{PICTURE_GUID}"/></a:extLst>'
+    ))
+    doc.save(path)
+
+def test_picture_guid_is_not_a_placeholder():
+    """Test extraction and filling on a document containing a picture"""
+    print("🧪 TESTING PLACEHOLDERS NEXT TO A PICTURE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        template_path = os.path.join(work_dir, "picture_template.docx")
+        output_path = os.path.join(work_dir, "picture_filled.docx")
+        build_document_with_picture(template_path)
+
+        placeholders = sorted(extract_placeholders_from_docx(template_path))
+        print(f"Placeholders: {placeholders}")
+        assert placeholders == ["imo", "vessel_name"], placeholders
+
+        assert fill_word_template(template_path, output_path, {"vessel_name": "Sea Star", "imo": "9876543"})
+        with zipfile.ZipFile(output_path) as output_zip:
+            document_xml = output_zip.read("word/document.xml").decode("utf-8")
+        assert f'uri="{PICTURE_GUID}"' in document_xml, "picture GUID was rewritten"
+
+        texts = [paragraph.text for paragraph in Document(output_path).paragraphs]
+        print(f"Filled paragraphs: {texts}")
+        assert "Vessel: Sea Star" in texts and "IMO: 9876543" in texts, texts
+
+    print("✅ Picture GUID left untouched, placeholders filled")
+
+if __name__ == "__main__":
+    test_picture_guid_is_not_a_placeholder()
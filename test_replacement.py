@@ -4,6 +4,7 @@ Test Replacement Script
 Tests the placeholder replacement process to debug why placeholders aren't being replaced
 """
 
+import io
 import os
 from document_processor import DocumentProcessor
 from docx import Document
@@ -85,7 +86,10 @@ def test_replacement():
     
     # Save test output
     test_output = f"test_replacement_output_{uuid.uuid4().hex[:8]}.docx"
-    test_doc.save(test_output)
+    buffer = io.BytesIO()
+    test_doc.save(buffer)
+    with open(test_output, 'wb') as f:
+        f.write(buffer.getvalue())
     print(f"\n💾 Test output saved as: {test_output}")
     
     # Count remaining placeholders
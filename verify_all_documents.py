@@ -5,7 +5,6 @@ Checks the quality of filled documents and provides detailed analysis
 """
 
 import os
-import glob
 from docx import Document
 import re
 
@@ -84,7 +83,8 @@ def main():
         print("❌ Outputs directory not found!")
         return
     
-    filled_docs = glob.glob(os.path.join(outputs_dir, "*_filled.docx"))
+    filled_docs = [entry.path for entry in os.scandir(outputs_dir)
+                   if entry.name.endswith('_filled.docx') and entry.is_file()]
     
     if not filled_docs:
         print("❌ No filled documents found!")